@@ -2,7 +2,9 @@
 ASGI entrypoint for the Puch AI MCP server.
 
 Run with:
-    uvicorn main:app --host 0.0.0.0 --port 8086
+    uvicorn main:app --host 0.0.0.0 --port 8086 --loop uvloop --http httptools --no-access-log
+or:
+    python main.py
 
 Exposes MCP over Streamable HTTP at /mcp/ path.
 Only two tools are registered: validate and convert_word_to_pdf.
@@ -10,8 +12,10 @@ Only two tools are registered: validate and convert_word_to_pdf.
 
 from __future__ import annotations
 
+import hmac
 import logging
 import os
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from fastmcp import FastMCP
 from fastmcp.server.auth.providers.bearer import BearerAuthProvider, RSAKeyPair
@@ -25,6 +29,7 @@ load_dotenv()
 
 # Basic logging config so tool logs are visible
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s - %(message)s')
+logger = logging.getLogger("puch.mcp")
 
 TOKEN = os.environ.get("AUTH_TOKEN")
 MY_NUMBER = os.environ.get("MY_NUMBER")
@@ -35,14 +40,22 @@ assert MY_NUMBER is not None, "Please set MY_NUMBER in your .env file"
 
 # Auth Provider (Bearer Token for Puch)
 class SimpleBearerAuthProvider(BearerAuthProvider):
+    # The key is never published (jwks_uri=None) and only satisfies the base
+    # class, so generate it once per process rather than per instance
+    _key_pair: RSAKeyPair | None = None
+
     def __init__(self, token: str):
-        k = RSAKeyPair.generate()
-        super().__init__(public_key=k.public_key, jwks_uri=None, issuer=None, audience=None)
+        cls = type(self)
+        if cls._key_pair is None:
+            cls._key_pair = RSAKeyPair.generate()
+        super().__init__(public_key=cls._key_pair.public_key, jwks_uri=None, issuer=None, audience=None)
         self.token = token
+        # The token is static, so build its AccessToken once instead of per request
+        self._access_token = AccessToken(token=token, client_id="puch-client", scopes=["*"], expires_at=None)
 
     async def load_access_token(self, token: str) -> AccessToken | None:
-        if token == self.token:
-            return AccessToken(token=token, client_id="puch-client", scopes=["*"], expires_at=None)
+        if hmac.compare_digest(token.encode(), self.token.encode()):
+            return self._access_token
         return None
 
 
@@ -51,6 +64,7 @@ mcp = FastMCP("Puch MCP Server", auth=SimpleBearerAuthProvider(TOKEN))
 
 
 # Register only the two required tools
+convert_tool = None
 try:
     from tools import validate as validate_tool
     from tools import convert as convert_tool
@@ -61,7 +75,7 @@ try:
     health_tool.register(mcp)
 except Exception as e:
     # Non-fatal; surfaces during tool call if needed
-    print(f"[tools] Warning: failed to register external tools: {e}")
+    logger.warning("tools: failed to register external tools: %s", e)
 
 
 # Expose ASGI app for uvicorn
@@ -70,8 +84,34 @@ FILES_DIR = os.environ.get("FILES_DIR", "files")
 os.makedirs(FILES_DIR, exist_ok=True)
 
 base_app = mcp.http_app()  # This app already serves MCP at /mcp
-# Important: pass the FastMCP app's lifespan to the parent app so session manager initializes
-app = Starlette(lifespan=base_app.lifespan)
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    # Important: run the FastMCP app's lifespan so the session manager initializes
+    async with base_app.lifespan(app):
+        yield
+    # Close pooled resources held by the tools
+    if convert_tool is not None:
+        await convert_tool.shutdown()
+
+
+app = Starlette(lifespan=lifespan)
 # Mount static first so it's not shadowed by the catch-all mount
 app.mount("/files", StaticFiles(directory=FILES_DIR, check_dir=True), name="files")
 app.mount("/", base_app)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # "auto" picks uvloop/httptools when installed (uvicorn[standard]) and falls
+    # back to asyncio/h11 otherwise (e.g., uvloop is unavailable on Windows).
+    uvicorn.run(
+        app,
+        host=os.environ.get("HOST", "0.0.0.0"),
+        port=int(os.environ.get("PORT", "8086")),
+        loop="auto",
+        http="auto",
+        access_log=False,
+    )
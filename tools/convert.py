@@ -1,56 +1,299 @@
 from __future__ import annotations
 
+import asyncio
 import base64
+import hashlib
 import logging
+import mmap
+import multiprocessing
 import os
+import re
+import secrets
+import subprocess
+import sys
 import tempfile
+import threading
 import time
-import uuid
-from typing import Any, Dict
-from urllib.parse import urlparse
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict
 
-import requests
+import httpx
 import shutil
 
 # pypandoc provides a python wrapper around pandoc and will attempt to download it
 # on first use if not present. This keeps the solution cross-platform.
 import pypandoc
 from importlib import import_module
+from importlib.util import find_spec
 
 from fastmcp import FastMCP
 
+# pybase64 (optional) uses SIMD kernels for base64; same API and output as the stdlib
+try:
+    from pybase64 import b64encode as _b64encode
+except ImportError:
+    from base64 import b64encode as _b64encode
+
 
 # File extension constants
 DOCX_EXT = ".docx"
 PDF_EXT = ".pdf"
+# File signatures: .docx is a ZIP container
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+
+# Read size when streaming downloads to disk
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# Downloads ask for the first part as a byte range; if the server honours it and
+# the file is larger, the remaining parts are fetched concurrently
+RANGE_PART_SIZE = 4 << 20
+RANGE_PARALLEL = 4
+_CONTENT_RANGE_RE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+
+# Base64 is encoded in chunks; a multiple of 3 keeps padding out of mid-stream chunks
+B64_CHUNK_SIZE = 3 * 65536
+
+# Converted PDFs are cached under FILES_DIR/cache, named by docx content hash
+CACHE_DIRNAME = "cache"
+_CACHE_NAME_RE = re.compile(r"[0-9a-f]{32}\.pdf")
+HASH_CHUNK_SIZE = 1 << 20
+
+# Base64 sniffing only inspects a prefix; the real decode happens once later
+_B64_PREFIX_LEN = 4096
+_B64_RE = re.compile(r"[A-Za-z0-9+/]*={0,2}")
 
 logger = logging.getLogger("puch.mcp.give_pdf")
 
+# Shared HTTP session so repeat downloads reuse pooled keep-alive connections
+# instead of paying a fresh TCP + TLS handshake per request.
+# The async client lets the event loop serve other tool calls during downloads.
+_HTTP = httpx.AsyncClient(
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    timeout=60.0,
+    follow_redirects=True,
+)
+
+# LaTeX engines pandoc can use for PDF output
+_PDF_ENGINES = ("pdflatex", "xelatex", "lualatex")
+
+# Resolved once per process by _ensure_pandoc() and _converters()
+_PANDOC_PATH: str | None = None
+_CONVERTERS: tuple[Callable[[str, str], None], ...] | None = None
+# First installed engine from _PDF_ENGINES, passed to pandoc as --pdf-engine
+_PDF_ENGINE: str | None = None
+
+# Dedicated worker pool for the blocking pandoc/docx2pdf work. Processes (not
+# threads) so conversions run in parallel across cores instead of queueing on
+# the GIL; created lazily by _convert_pool().
+_CONVERT_POOL: Executor | None = None
+_LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s - %(message)s"
+
+# In-flight conversions keyed by cache path, so concurrent requests for the
+# same document share one pandoc run
+_INFLIGHT: dict[str, asyncio.Task[None]] = {}
+
+# Cache entries a request is using (hit or fresh conversion) until it has published
+# them; _evict_cache never deletes these. The lock orders pinning against each unlink.
+_CACHE_PINS: dict[str, int] = {}
+_CACHE_LOCK = threading.Lock()
+
+# Cap concurrent conversions at the pool size (a core is left for the event loop);
+# past that, parallel pandoc + LaTeX runs only add memory pressure and disk thrash.
+# Extra requests queue here.
+CONVERT_CONCURRENCY = max(1, (os.cpu_count() or 2) - 1)
+_CONVERT_SEM = asyncio.Semaphore(CONVERT_CONCURRENCY)
+_convert_waiting = 0
+
+# Directories already created by this process; output always lands in the same few
+_MADE_DIRS: set[str] = set()
+
+
+def _ensure_dir(path: str, recreate: bool = False) -> None:
+    """makedirs once per path; recreate=True forgets the path first (it was deleted)."""
+    if recreate:
+        _MADE_DIRS.discard(path)
+    if path not in _MADE_DIRS:
+        os.makedirs(path, exist_ok=True)
+        _MADE_DIRS.add(path)
+
+
 def _is_url(path_or_url: str) -> bool:
+    # Prefix test instead of urlparse; schemes are case-insensitive like urlparse's
+    return path_or_url[:8].lower().startswith(("http://", "https://"))
+
+
+def _write_all(fd: int, data: bytes | memoryview) -> None:
+    """os.write until every byte is written (a single call may write fewer)."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _write_tempfile(suffix: str, data: bytes) -> str:
+    """Write bytes straight to a fresh mkstemp fd and return the file's path."""
+    fd, tmp_path = tempfile.mkstemp(suffix=suffix)
     try:
-        parsed = urlparse(path_or_url)
-        return parsed.scheme in {"http", "https"}
+        _write_all(fd, data)
     except Exception:
-        return False
+        os.close(fd)
+        _safe_remove(tmp_path)
+        raise
+    os.close(fd)
+    return tmp_path
 
 
-def _download_docx(url: str) -> str:
-    """Download a .docx file from URL into a temp file and return its path."""
-    logger.info("download:url start", extra={"url": url})
-    t0 = time.perf_counter()
-    resp = requests.get(url, timeout=60)
-    resp.raise_for_status()
+class _RangeMismatch(Exception):
+    """A ranged response didn't cover the requested bytes."""
+
+
+def _content_range(resp: httpx.Response) -> tuple[int, int, int] | None:
+    """Parse Content-Range of a 206 response into (start, end, total)."""
+    if resp.status_code != 206:
+        return None
+    m = _CONTENT_RANGE_RE.fullmatch(resp.headers.get("content-range", "").strip())
+    return (int(m[1]), int(m[2]), int(m[3])) if m else None
+
 
+async def _write_body_at(resp: httpx.Response, path: str, offset: int, raw: bool = False) -> int:
+    """Stream a response body into path starting at offset; return bytes written.
+
+    Each call writes through its own descriptor, so concurrent parts never share
+    a file position.
+    """
+    flags = os.O_WRONLY | getattr(os, "O_BINARY", 0) | (0 if offset else os.O_TRUNC)
+    fd = os.open(path, flags)
+    written = 0
+    try:
+        os.lseek(fd, offset, os.SEEK_SET)
+        # Range offsets refer to the bytes on the wire, so ranged parts are written raw
+        chunks = resp.aiter_raw(DOWNLOAD_CHUNK_SIZE) if raw else resp.aiter_bytes(DOWNLOAD_CHUNK_SIZE)
+        async for chunk in chunks:
+            _write_all(fd, chunk)
+            written += len(chunk)
+    finally:
+        os.close(fd)
+    return written
+
+
+def _range_validator(resp: httpx.Response) -> str | None:
+    """Strong ETag, else Last-Modified, for If-Range; None if the response has neither."""
+    etag = resp.headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return resp.headers.get("last-modified")
+
+
+async def _fetch_part(
+    url: str,
+    headers: dict[str, str],
+    path: str,
+    start: int,
+    end: int,
+    total: int,
+    validator: str,
+    limit: asyncio.Semaphore,
+) -> None:
+    async with limit:
+        # If-Range: a changed resource comes back as a full 200 instead of a range of the new version
+        part_headers = {**headers, "Range": f"bytes={start}-{end}", "If-Range": validator, "Accept-Encoding": "identity"}
+        async with _HTTP.stream("GET", url, headers=part_headers) as resp:
+            if resp.status_code == 412:
+                raise _RangeMismatch(f"precondition failed for bytes {start}-{end}")
+            resp.raise_for_status()
+            cr = _content_range(resp)
+            if cr is None or cr != (start, end, total):
+                raise _RangeMismatch(f"expected bytes {start}-{end}/{total}, got {resp.status_code} {cr}")
+            if await _write_body_at(resp, path, start, raw=True) != end - start + 1:
+                raise _RangeMismatch(f"short body for bytes {start}-{end}")
+
+
+async def _write_first_part(resp: httpx.Response, path: str, size: int) -> None:
+    """Write the first ranged body at offset 0, insisting on all of its bytes."""
+    if await _write_body_at(resp, path, 0, raw=True) != size:
+        raise _RangeMismatch(f"short body for bytes 0-{size - 1}")
+
+
+async def _download_into(url: str, headers: dict[str, str], path: str) -> int:
+    """Download url into path and return its size.
+
+    The first GET asks for bytes 0..RANGE_PART_SIZE-1. A plain 200 is streamed as
+    is, so servers without range support cost nothing extra. A 206 reveals the
+    total size, and the rest is fetched as parallel ranged GETs on pooled
+    connections, each written at its own offset. Every part is pinned to the
+    first response's ETag/Last-Modified with If-Range, so a file that changes
+    mid-download falls back to one plain GET instead of mixing versions.
+    """
+    first = {**headers, "Range": f"bytes=0-{RANGE_PART_SIZE - 1}", "Accept-Encoding": "identity"}
+    async with _HTTP.stream("GET", url, headers=first) as resp:
+        if resp.status_code != 416:
+            resp.raise_for_status()
+        if resp.status_code == 200:
+            return await _write_body_at(resp, path, 0)
+        cr = _content_range(resp)
+        if cr is None or cr[0] != 0:
+            # A 206 without a usable Content-Range (missing, "*/total", or not from 0),
+            # or a 416: the body can't be placed, so fetch the file whole below
+            logger.warning("download:range unusable, retrying as one GET", extra={"status": resp.status_code})
+        else:
+            total = cr[2]
+            parts = [(lo, min(lo + RANGE_PART_SIZE, total) - 1) for lo in range(cr[1] + 1, total, RANGE_PART_SIZE)]
+            validator = _range_validator(resp)
+            if not parts:
+                if await _write_body_at(resp, path, 0, raw=True) == total:
+                    return total
+                logger.warning("download:range short body, retrying as one GET", extra={"bytes": total})
+            elif validator is None:
+                # Nothing to pin the other parts to this version with; fetch it whole below
+                logger.info("download:ranges skipped, no ETag/Last-Modified", extra={"bytes": total})
+            else:
+                logger.info("download:ranges", extra={"bytes": total, "parts": len(parts) + 1})
+                limit = asyncio.Semaphore(RANGE_PARALLEL)
+                try:
+                    async with asyncio.TaskGroup() as tg:
+                        tg.create_task(_write_first_part(resp, path, cr[1] + 1))
+                        for lo, hi in parts:
+                            tg.create_task(_fetch_part(url, headers, path, lo, hi, total, validator, limit))
+                except ExceptionGroup as eg:
+                    # Inconsistent ranges, HTTP errors (429/403/416...), timeouts and dropped
+                    # connections may all still work as one GET; anything else (disk errors) is raised
+                    fallback, rest = eg.split((_RangeMismatch, httpx.HTTPError))
+                    if rest is not None:
+                        raise rest.exceptions[0] from None
+                    logger.warning("download:ranges failed, retrying as one GET", extra={"error": str(fallback.exceptions[0])})
+                else:
+                    return total
+    # Unusable first range, no validator, or the ranges weren't served consistently
+    async with _HTTP.stream("GET", url, headers=headers) as resp:
+        resp.raise_for_status()
+        return await _write_body_at(resp, path, 0)
+
+
+async def _download_to_temp_docx(url: str, headers: dict[str, str]) -> tuple[str, int]:
+    """Download url into a new temp .docx and return (path, size)."""
     fd, tmp_path = tempfile.mkstemp(suffix=DOCX_EXT)
     os.close(fd)
-    with open(tmp_path, "wb") as f:
-        f.write(resp.content)
+    try:
+        size = await _download_into(url, headers, tmp_path)
+    except BaseException:
+        # Includes cancellation mid-download
+        _safe_remove(tmp_path)
+        raise
+    return tmp_path, size
+
+
+async def _download_docx(url: str) -> str:
+    """Download a .docx file from URL into a temp file and return its path."""
+    logger.info("download:url start", extra={"url": url})
+    t0 = time.perf_counter()
+    tmp_path, size = await _download_to_temp_docx(url, {})
     dur = (time.perf_counter() - t0) * 1000
-    logger.info("download:url done", extra={"bytes": len(resp.content), "ms": round(dur, 1)})
+    logger.info("download:url done", extra={"bytes": size, "ms": round(dur, 1)})
     return tmp_path
 
 
-def _download_docx_by_id(file_id: str) -> str:
+async def _download_docx_by_id(file_id: str) -> str:
     """Download a .docx using an ID and a configured URL template.
 
     Requires env PUCH_DOWNLOAD_URL_TEMPLATE, e.g.,
@@ -70,105 +313,404 @@ def _download_docx_by_id(file_id: str) -> str:
         headers["Authorization"] = f"Bearer {token}"
     logger.info("download:id start", extra={"id": str(file_id)})
     t0 = time.perf_counter()
-    resp = requests.get(url, headers=headers, timeout=60)
-    resp.raise_for_status()
-    fd, tmp_path = tempfile.mkstemp(suffix=DOCX_EXT)
-    os.close(fd)
-    with open(tmp_path, "wb") as f:
-        f.write(resp.content)
+    tmp_path, size = await _download_to_temp_docx(url, headers)
     dur = (time.perf_counter() - t0) * 1000
-    logger.info("download:id done", extra={"id": str(file_id), "bytes": len(resp.content), "ms": round(dur, 1)})
+    logger.info("download:id done", extra={"id": str(file_id), "bytes": size, "ms": round(dur, 1)})
     return tmp_path
 
 
+def _ensure_pandoc() -> str:
+    """Locate pandoc once per process, downloading it on the first miss."""
+    global _PANDOC_PATH
+    if _PANDOC_PATH is None:
+        try:
+            path = pypandoc.get_pandoc_path()
+        except OSError:
+            logger.info("pandoc:download start")
+            pypandoc.download_pandoc()
+            logger.info("pandoc:download done")
+            path = pypandoc.get_pandoc_path()
+        # Pin pypandoc to this binary so any later re-resolution (it clears its
+        # cache after downloads) checks one path instead of probing every
+        # candidate with `pandoc --version`
+        os.environ.setdefault("PYPANDOC_PANDOC", path)
+        _PANDOC_PATH = path
+        logger.info("pandoc ready", extra={"path": path})
+    return _PANDOC_PATH
+
+
+def _run_pandoc(pandoc: str, input_docx: str, output_pdf: str) -> None:
+    # Direct call: pypandoc.convert_file spawns two extra `pandoc --list-*-formats`
+    # probes per conversion before the real run. A long-lived `pandoc server` is not
+    # an option here: server mode does no IO, so it can neither run a PDF engine nor
+    # extract docx media, and the process startup stays per conversion.
+    argv = [pandoc, "-f", "docx", os.fspath(input_docx), "-o", os.fspath(output_pdf)]
+    if _PDF_ENGINE:
+        # pandoc only ever tries pdflatex by default
+        argv.append(f"--pdf-engine={_PDF_ENGINE}")
+    try:
+        subprocess.run(argv, check=True, stdin=subprocess.DEVNULL, capture_output=True)
+    except subprocess.CalledProcessError as e:
+        err = (e.stderr or b"").decode("utf-8", "replace").strip()
+        raise RuntimeError(f"pandoc exited with {e.returncode}: {err or 'no output'}") from None
+
+
+def _convert_with_pandoc(input_docx: str, output_pdf: str) -> None:
+    """Convert docx to pdf by running pandoc directly."""
+    global _PANDOC_PATH
+    try:
+        _run_pandoc(_ensure_pandoc(), input_docx, output_pdf)
+    except FileNotFoundError:
+        # Cached binary vanished: re-resolve (downloading if needed) and retry once
+        logger.warning("pandoc missing; re-resolving", extra={"path": _PANDOC_PATH})
+        if os.environ.get("PYPANDOC_PANDOC") == _PANDOC_PATH:
+            del os.environ["PYPANDOC_PANDOC"]
+        _PANDOC_PATH = None
+        pypandoc.clean_pandocpath_cache()
+        _run_pandoc(_ensure_pandoc(), input_docx, output_pdf)
+
+
+def _converters() -> tuple[Callable[[str, str], None], ...]:
+    """Choose the converter order once per process.
+
+    pandoc is primary and docx2pdf (MS Word, Windows/macOS only) the fallback.
+    pandoc cannot write PDF without a LaTeX engine, so when none is installed
+    docx2pdf goes first instead of failing through pandoc on every request.
+    """
+    global _CONVERTERS, _PDF_ENGINE
+    if _CONVERTERS is None:
+        has_docx2pdf = sys.platform in ("win32", "darwin") and find_spec("docx2pdf") is not None
+        _PDF_ENGINE = next((path for path in map(shutil.which, _PDF_ENGINES) if path), None)
+        has_latex = _PDF_ENGINE is not None
+        if has_docx2pdf and not has_latex:
+            _CONVERTERS = (_convert_with_docx2pdf, _convert_with_pandoc)
+        elif has_docx2pdf:
+            _CONVERTERS = (_convert_with_pandoc, _convert_with_docx2pdf)
+        else:
+            _CONVERTERS = (_convert_with_pandoc,)
+        logger.info("convert strategy", extra={"order": [c.__name__ for c in _CONVERTERS], "pdf_engine": _PDF_ENGINE})
+    return _CONVERTERS
+
+
 def _convert_docx_to_pdf(input_docx: str, output_pdf: str) -> None:
-    """Convert docx to pdf using pypandoc (pandoc under the hood)."""
-    # Ensure output directory exists
-    os.makedirs(os.path.dirname(os.path.abspath(output_pdf)) or ".", exist_ok=True)
+    """Convert docx to pdf with the first converter from _converters() that succeeds.
 
-    # pypandoc will try to locate pandoc; if missing, enable download
+    output_pdf's directory must exist; _convert_atomic creates it.
+    """
     t0 = time.perf_counter()
-    try:
-        logger.info("convert start", extra={"input": os.path.basename(input_docx)})
-        pypandoc.convert_file(
-            source_file=input_docx,
-            to="pdf",
-            outputfile=output_pdf,
-            extra_args=[],
-        )
-    except OSError:
-        # Attempt automatic pandoc download and retry once
-        logger.info("pandoc:download start")
-        pypandoc.download_pandoc()
-        logger.info("pandoc:download done")
+    logger.info("convert start", extra={"input": os.path.basename(input_docx)})
+    converters = _converters()
+    for i, convert in enumerate(converters):
         try:
-            pypandoc.convert_file(
-                source_file=input_docx,
-                to="pdf",
-                outputfile=output_pdf,
-                extra_args=[],
-            )
+            convert(input_docx, output_pdf)
+            break
         except Exception as e:
-            # If LaTeX engine is missing, fall back to docx2pdf (Windows/MS Word)
-            logger.warning("pandoc convert failed, trying docx2pdf", extra={"error": str(e)})
-            _convert_with_docx2pdf(input_docx, output_pdf)
-    except Exception as e:
-        # Unknown error - try docx2pdf as a last resort
-        logger.warning("convert error, trying docx2pdf fallback", extra={"error": str(e)})
-        _convert_with_docx2pdf(input_docx, output_pdf)
+            if i == len(converters) - 1:
+                raise
+            logger.warning(
+                "convert failed, trying next converter",
+                extra={"converter": convert.__name__, "error": str(e)},
+            )
     dur = (time.perf_counter() - t0) * 1000
     logger.info("convert done", extra={"output": os.path.basename(output_pdf), "ms": round(dur, 1)})
 
 
+def _convert_atomic(input_docx: str, output_pdf: str) -> None:
+    """Convert into a sibling temp file and rename, so readers never see a partial PDF."""
+    out_dir = os.path.dirname(output_pdf) or "."
+    _ensure_dir(out_dir)
+    try:
+        fd, tmp_pdf = tempfile.mkstemp(suffix=PDF_EXT, dir=out_dir)
+    except FileNotFoundError:
+        # Directory removed since this process created it (operator, /tmp cleaner)
+        _ensure_dir(out_dir, recreate=True)
+        fd, tmp_pdf = tempfile.mkstemp(suffix=PDF_EXT, dir=out_dir)
+    os.close(fd)
+    try:
+        _convert_docx_to_pdf(input_docx, tmp_pdf)
+        # mkstemp creates 0600; published PDFs should be world-readable like before
+        os.chmod(tmp_pdf, 0o644)
+        os.replace(tmp_pdf, output_pdf)
+    except Exception:
+        _safe_remove(tmp_pdf)
+        raise
+
+
+def _init_convert_worker(log_level: int) -> None:
+    """Process-pool initializer: set up logging, locate pandoc, and pick converters up front."""
+    logging.basicConfig(level=log_level, format=_LOG_FORMAT)
+    _converters()
+    try:
+        _ensure_pandoc()
+    except Exception as e:
+        # Never fail the initializer (that breaks the pool); the docx2pdf
+        # fallback may still work and pandoc is retried on the next conversion
+        logger.warning("pandoc unavailable at worker start", extra={"error": str(e)})
+
+
+def _convert_pool() -> Executor:
+    """Return the conversion pool, creating it on first use."""
+    global _CONVERT_POOL
+    if _CONVERT_POOL is None:
+        # One worker per semaphore slot, so every admitted conversion is running, not queued
+        workers = CONVERT_CONCURRENCY
+        # Never fork: the pool starts lazily, after to_thread workers and the HTTP client
+        # are running, and forking a multi-threaded process can deadlock the child
+        methods = multiprocessing.get_all_start_methods()
+        ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        try:
+            _CONVERT_POOL = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=ctx,
+                initializer=_init_convert_worker,
+                initargs=(logging.getLogger().getEffectiveLevel(),),
+            )
+        except (OSError, NotImplementedError) as e:
+            # No POSIX semaphores (e.g., AWS Lambda / Vercel); fall back to threads
+            logger.warning("convert pool: processes unavailable, using threads", extra={"error": str(e)})
+            _CONVERT_POOL = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="convert")
+    return _CONVERT_POOL
+
+
+async def _run_conversion(input_docx: str, output_pdf: str) -> None:
+    """Convert under the concurrency cap, logging when requests have to queue."""
+    global _convert_waiting
+    if _CONVERT_SEM.locked():
+        _convert_waiting += 1
+        logger.info("convert queued", extra={"waiting": _convert_waiting, "limit": CONVERT_CONCURRENCY})
+        try:
+            await _CONVERT_SEM.acquire()
+        finally:
+            _convert_waiting -= 1
+    else:
+        await _CONVERT_SEM.acquire()
+    try:
+        await _run_in_convert_pool(input_docx, output_pdf)
+    finally:
+        _CONVERT_SEM.release()
+
+
+async def _run_in_convert_pool(input_docx: str, output_pdf: str) -> None:
+    """Run _convert_atomic on the conversion pool without blocking the event loop."""
+    global _CONVERT_POOL
+    pool = _convert_pool()
+    loop = asyncio.get_running_loop()
+    try:
+        # Only the two path strings cross the process boundary
+        await loop.run_in_executor(pool, _convert_atomic, input_docx, output_pdf)
+    except BrokenProcessPool:
+        # A worker died (e.g., OOM); drop the pool so the next call starts fresh
+        if _CONVERT_POOL is pool:
+            _CONVERT_POOL = None
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+
+
+def _read_head(path: str, n: int = 8) -> bytes:
+    with open(path, "rb") as f:
+        return f.read(n)
+
+
+def _hash_file(path: str) -> str:
+    """Return a 128-bit BLAKE2b hex digest of a file, read in 1 MiB chunks."""
+    # A cache key, not a signature: blake2b is faster than sha256 on CPUs without SHA extensions
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cached_pdf_path(files_dir: str, digest: str) -> str:
+    return os.path.abspath(os.path.join(files_dir, CACHE_DIRNAME, f"{digest}{PDF_EXT}"))
+
+
+def _touch_cached(cache_pdf: str) -> None:
+    """Mark a cache hit for LRU eviction.
+
+    Bumps atime only: published PDFs are hardlinks to the same inode, and their
+    ETag/Last-Modified come from mtime.
+    """
+    try:
+        st = os.stat(cache_pdf)
+        os.utime(cache_pdf, ns=(time.time_ns(), st.st_mtime_ns))
+    except OSError:
+        pass
+
+
+def _pin_cached(cache_pdf: str) -> None:
+    with _CACHE_LOCK:
+        _CACHE_PINS[cache_pdf] = _CACHE_PINS.get(cache_pdf, 0) + 1
+
+
+def _unpin_cached(cache_pdf: str) -> None:
+    with _CACHE_LOCK:
+        n = _CACHE_PINS.pop(cache_pdf) - 1
+        if n:
+            _CACHE_PINS[cache_pdf] = n
+
+
+def _evict_cache(cache_dir: str, max_bytes: int) -> None:
+    """Delete least recently used cache-only PDFs until they fit in max_bytes.
+
+    An entry that is still published shares its inode with the FILES_DIR copy, so
+    deleting it frees nothing and only loses the cache hit. Only entries with no
+    other link left (st_nlink == 1) are counted and evicted, and never one that a
+    request has pinned on its way to publishing it.
+    """
+    entries = []
+    total = 0
+    with os.scandir(cache_dir) as it:
+        for e in it:
+            # Only finished entries; in-progress conversions use mkstemp names
+            if not _CACHE_NAME_RE.fullmatch(e.name) or e.path in _CACHE_PINS:
+                continue
+            try:
+                # os.stat, not DirEntry.stat: the latter reports st_nlink 0 on Windows
+                st = os.stat(e.path)
+            except OSError:
+                continue
+            if st.st_nlink == 1:
+                entries.append((st.st_atime, st.st_size, e.path))
+                total += st.st_size
+    if total <= max_bytes:
+        return
+    entries.sort()
+    removed = 0
+    for _atime, size, path in entries:
+        if total <= max_bytes:
+            break
+        with _CACHE_LOCK:
+            # Re-checked under the lock: a request may have pinned it since the scan
+            if path in _CACHE_PINS:
+                continue
+            _safe_remove(path)
+        total -= size
+        removed += 1
+    logger.info("cache:evict", extra={"removed": removed, "bytes": total, "limit": max_bytes})
+
+
+async def _convert_cached(input_docx: str, cache_pdf: str, owned: bool = False) -> bool:
+    """Make sure cache_pdf exists, converting at most once per document.
+
+    Returns True when the PDF was already cached. Concurrent callers for the
+    same cache_pdf await the conversion already in flight. With owned=True,
+    input_docx is the caller's temp file and a new conversion takes it over.
+    """
+    if os.path.exists(cache_pdf):
+        return True
+    task = _INFLIGHT.get(cache_pdf)
+    if task is None:
+        if owned:
+            # Rename rather than share: other requests wait on this task, so the caller's
+            # cleanup (on return or cancellation) must not delete the input before pandoc reads it
+            taken = f"{os.path.splitext(input_docx)[0]}.{secrets.token_hex(4)}{DOCX_EXT}"
+            os.rename(input_docx, taken)
+            task = asyncio.ensure_future(_run_conversion_and_remove(taken, cache_pdf))
+        else:
+            task = asyncio.ensure_future(_run_conversion(input_docx, cache_pdf))
+        _INFLIGHT[cache_pdf] = task
+        task.add_done_callback(lambda _t: _INFLIGHT.pop(cache_pdf, None))
+    # shield: one caller being cancelled must not cancel the shared conversion
+    await asyncio.shield(task)
+    return False
+
+
+async def _run_conversion_and_remove(input_docx: str, cache_pdf: str) -> None:
+    try:
+        await _run_conversion(input_docx, cache_pdf)
+    finally:
+        _safe_remove(input_docx)
+
+
+def _link_or_copy(src: str, dst: str, link: bool = True) -> None:
+    """Place src at dst as a hardlink, copying when linking isn't possible or link=False.
+
+    The file is created under a temp name and renamed over dst, so an existing
+    dst is replaced atomically and readers never see a missing or partial file.
+    """
+    if src == dst:
+        return
+    dst_dir = os.path.dirname(dst) or "."
+    _ensure_dir(dst_dir)
+    try:
+        _place_file(src, dst, link)
+    except FileNotFoundError:
+        if os.path.isdir(dst_dir):
+            # It's src that is missing
+            raise
+        # dst_dir removed since this process created it (operator, /tmp cleaner)
+        _ensure_dir(dst_dir, recreate=True)
+        _place_file(src, dst, link)
+
+
+def _place_file(src: str, dst: str, link: bool) -> None:
+    tmp_dst = f"{dst}.{secrets.token_hex(4)}.tmp"
+    try:
+        linked = False
+        if link:
+            try:
+                os.link(src, tmp_dst)
+                linked = True
+            except OSError:
+                # Cross-device, or a filesystem without hardlinks
+                pass
+        if not linked:
+            shutil.copyfile(src, tmp_dst)
+            os.chmod(tmp_dst, 0o644)
+        os.replace(tmp_dst, dst)
+    finally:
+        # rename() is a no-op when dst is already a link to src, leaving tmp behind
+        _safe_remove(tmp_dst)
+
+
 def _convert_with_docx2pdf(input_docx: str, output_pdf: str) -> None:
     """Fallback converter using docx2pdf (requires MS Word on Windows)."""
     try:
         docx2pdf = import_module("docx2pdf")
     except Exception as e:
         raise RuntimeError("docx2pdf not installed; install and retry") from e
-    # Ensure output directory exists
-    os.makedirs(os.path.dirname(os.path.abspath(output_pdf)) or ".", exist_ok=True)
     logger.info("docx2pdf start", extra={"input": os.path.basename(input_docx)})
     docx2pdf.convert(input_docx, output_pdf)
     logger.info("docx2pdf done", extra={"output": os.path.basename(output_pdf)})
 
 
 def _read_pdf_base64(pdf_path: str) -> str:
+    """Base64-encode a file straight from its mapped pages into one preallocated buffer."""
     with open(pdf_path, "rb") as f:
-        return base64.b64encode(f.read()).decode("utf-8")
-
-
-def _write_temp_docx_from_base64(b64: str) -> str:
-    """Write base64 docx content to a temp file and return its path."""
-    fd, tmp_path = tempfile.mkstemp(suffix=DOCX_EXT)
-    os.close(fd)
-    with open(tmp_path, "wb") as f:
-        f.write(base64.b64decode(b64))
-    return tmp_path
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            # mmap can't map an empty file
+            return ""
+        out = bytearray((size + 2) // 3 * 4)
+        # Published PDFs are replaced atomically, never truncated in place, so the mapping stays valid
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            pos = 0
+            for off in range(0, size, B64_CHUNK_SIZE):
+                enc = _b64encode(view[off : off + B64_CHUNK_SIZE])
+                out[pos : pos + len(enc)] = enc
+                pos += len(enc)
+    return out.decode("ascii")
 
 
 def _looks_like_base64(s: str) -> bool:
-    try:
-        # validate=True ensures characters outside base64 alphabet raise
-        base64.b64decode(s, validate=True)
-        return True
-    except Exception:
-        return False
+    """Cheap shape check (length and alphabet of a prefix) without decoding."""
+    return len(s) >= 16 and len(s) % 4 == 0 and bool(_B64_RE.fullmatch(s, 0, _B64_PREFIX_LEN))
+
 
+async def _resolve_input_path(docx_source: str | None, attachment: bytes | None) -> tuple[str, bool] | tuple[None, None]:
+    """Return (input_path, cleanup_tmp) or (None, None) without a source.
 
-def _resolve_input_path(docx_source: str | None, attachment_b64: str | None) -> tuple[str, bool] | tuple[None, None]:
-    """Return (input_path, cleanup_tmp) or (None, None) if invalid."""
-    if attachment_b64:
-        tmp_path = _write_temp_docx_from_base64(attachment_b64)
+    Local paths are not checked here; a missing file surfaces when it is first opened.
+    """
+    if attachment:
+        tmp_path = await asyncio.to_thread(_write_tempfile, DOCX_EXT, attachment)
         return tmp_path, True
     if docx_source:
         if _is_url(docx_source):
-            tmp_docx = _download_docx(docx_source)
+            tmp_docx = await _download_docx(docx_source)
             return tmp_docx, True
-        abs_path = os.path.abspath(docx_source)
-        if os.path.exists(abs_path):
-            return abs_path, False
-        return None, None
+        return os.path.abspath(docx_source), False
     return None, None
 
 
@@ -184,11 +726,13 @@ def _resolve_output_pdf_path(files_dir: str, filename: str | None, input_path: s
     return os.path.abspath(os.path.join(files_dir, f"{base_name_no_ext}{PDF_EXT}"))
 
 
-def _publish_and_url(files_dir: str, output_pdf: str, base_url: str | None) -> tuple[str, str | None]:
+def _publish_and_url(
+    files_dir: str, src_pdf: str, output_pdf: str, base_url: str | None, link: bool = True
+) -> tuple[str, str | None]:
+    """Link (or copy) src_pdf into files_dir under output_pdf's file name and build its URL."""
     filename = os.path.basename(output_pdf) or f"output{PDF_EXT}"
     public_pdf_path = os.path.abspath(os.path.join(files_dir, filename))
-    if os.path.abspath(output_pdf) != public_pdf_path:
-        shutil.copy2(output_pdf, public_pdf_path)
+    _link_or_copy(src_pdf, public_pdf_path, link)
     file_url = f"{base_url.rstrip('/')}/files/{filename}" if base_url else None
     logger.info("publish done", extra={"file": filename, "url": file_url})
     return public_pdf_path, file_url
@@ -202,7 +746,7 @@ def _safe_remove(path: str | None):
         pass
 
 
-def _get_config() -> tuple[str, str | None, bool]:
+def _compute_config() -> tuple[str, str | None, bool, int, int]:
     # Prefer FILES_DIR; default to /tmp on Vercel, else local 'files'
     if os.environ.get("FILES_DIR"):
         files_dir = os.environ["FILES_DIR"]
@@ -211,7 +755,16 @@ def _get_config() -> tuple[str, str | None, bool]:
     os.makedirs(files_dir, exist_ok=True)
     base_url = os.environ.get("BASE_URL")  # e.g., https://<ngrok-domain>
     include_b64 = os.environ.get("INCLUDE_BASE64", "false").lower() == "true"
-    return files_dir, base_url, include_b64
+    # PDFs larger than this are returned by URL only, never inlined as base64
+    inline_max = int(os.environ.get("PDF_INLINE_MAX_BYTES") or 2 * 1024 * 1024)
+    # Cap on bytes held only by FILES_DIR/cache (entries no longer published);
+    # least recently used ones are evicted past it (0 = no cap)
+    cache_max = int(os.environ.get("PDF_CACHE_MAX_BYTES") or 512 * 1024 * 1024)
+    return files_dir, base_url, include_b64, inline_max, cache_max
+
+
+# Read once at import; the environment doesn't change while the server runs
+_FILES_DIR, _BASE_URL, _INCLUDE_B64, _INLINE_MAX_BYTES, _CACHE_MAX_BYTES = _compute_config()
 
 
 def _success_result(file_url: str, pdf_b64: str | None) -> Dict[str, Any]:
@@ -224,6 +777,15 @@ def _success_result(file_url: str, pdf_b64: str | None) -> Dict[str, Any]:
     return out
 
 
+async def shutdown() -> None:
+    """Release pooled HTTP connections and workers; called from the app lifespan on exit."""
+    global _CONVERT_POOL
+    await _HTTP.aclose()
+    if _CONVERT_POOL is not None:
+        _CONVERT_POOL.shutdown(wait=False, cancel_futures=True)
+        _CONVERT_POOL = None
+
+
 def register(mcp: FastMCP):
     """Register the convert_word_to_pdf tool on the given FastMCP instance."""
 
@@ -240,11 +802,16 @@ def register(mcp: FastMCP):
         file_base64: str | None = None,
         puch_file_data: str | None = None,
         filename: str | None = None,
+        include_base64: bool | None = None,
     ) -> Dict[str, Any]:
+        input_path = None
+        cleanup_tmp = False
+        pinned = None
         try:
-            req_id = uuid.uuid4().hex[:8]
-            # Config for publishing
-            files_dir, base_url, include_b64 = _get_config()
+            req_id = secrets.token_hex(4)
+            # Config for publishing; include_base64 overrides INCLUDE_BASE64 per request
+            files_dir, base_url = _FILES_DIR, _BASE_URL
+            include_b64 = _INCLUDE_B64 if include_base64 is None else include_base64
             logger.info(
                 "give_pdf start",
                 extra={
@@ -252,21 +819,22 @@ def register(mcp: FastMCP):
                     "has_docx_source": bool(docx_source),
                     "has_file_base64": bool(file_base64),
                     "has_puch_file_data": bool(puch_file_data),
-                    "filename": filename,
+                    "output_name": filename,
                     "output_path": bool(output_path),
                 },
             )
 
             # Decide if the source is attachment (base64), URL, or local path
             attachment_b64 = file_base64 or (puch_file_data if (puch_file_data and _looks_like_base64(puch_file_data)) else None)
+            # Decode exactly once, off the event loop (multi-MB attachments take a while);
+            # the bytes go straight to the temp file
+            attachment = await asyncio.to_thread(base64.b64decode, attachment_b64) if attachment_b64 else None
 
             # If puch_file_data is present but not base64, treat as an attachment ID
-            input_path = None
-            cleanup_tmp = False
             if puch_file_data and not attachment_b64:
                 try:
                     logger.info("source:id", extra={"req": req_id, "id": str(puch_file_data)})
-                    tmp = _download_docx_by_id(str(puch_file_data))
+                    tmp = await _download_docx_by_id(str(puch_file_data))
                     input_path, cleanup_tmp = tmp, True
                 except Exception as e:
                     logger.error("source:id error", extra={"req": req_id, "error": str(e)})
@@ -274,7 +842,7 @@ def register(mcp: FastMCP):
 
             # Fallback to normal resolution if we don't already have an input path
             if not input_path:
-                input_path, cleanup_tmp = _resolve_input_path(docx_source, attachment_b64)
+                input_path, cleanup_tmp = await _resolve_input_path(docx_source, attachment)
                 if input_path:
                     if attachment_b64:
                         src_type = "attachment_b64"
@@ -290,39 +858,92 @@ def register(mcp: FastMCP):
                         },
                     )
             if not input_path:
-                if docx_source:
-                    logger.error("resolve error:not found", extra={"req": req_id, "path": docx_source})
-                    return {"success": False, "error": f"File not found: {docx_source}"}
                 logger.error("resolve error:no input", extra={"req": req_id})
                 return {"success": False, "error": "Provide a docx_source (URL/path) or file_base64 (attachment), or configure PUCH_DOWNLOAD_URL_TEMPLATE for attachment IDs."}
 
-            # Normalize output path (where conversion always writes)
+            # Normalize output path (the public file, unless the caller chose a path)
             output_pdf = _resolve_output_pdf_path(files_dir, filename, input_path, output_path)
 
-            # Convert docx to pdf
-            _convert_docx_to_pdf(input_path, output_pdf)
-
-            # Publish/copy into files_dir for static serving
-            public_pdf_path, file_url = _publish_and_url(files_dir, output_pdf, base_url)
+            try:
+                head = await asyncio.to_thread(_read_head, input_path)
+            except FileNotFoundError:
+                # Local paths are only checked here, by the first open
+                if cleanup_tmp:
+                    raise
+                logger.error("resolve error:not found", extra={"req": req_id, "path": docx_source})
+                return {"success": False, "error": f"File not found: {docx_source}"}
+
+            # Only files this request owns may be hard-linked into FILES_DIR
+            link_src = True
+            if head.startswith(PDF_MAGIC):
+                # Source is already a PDF (misnamed upload/URL): publish it as is
+                src_pdf = input_path
+                if cleanup_tmp:
+                    # Our mkstemp temp is 0600; published PDFs are world-readable
+                    await asyncio.to_thread(os.chmod, input_path, 0o644)
+                else:
+                    # The caller's own file gets copied, never linked into the served directory
+                    link_src = False
+                logger.info("convert:passthrough", extra={"req": req_id})
+            elif not head.startswith(ZIP_MAGIC):
+                logger.error("resolve error:not docx", extra={"req": req_id, "head": head.hex()})
+                return {"success": False, "error": "Source is not a .docx file (expected a ZIP-based Word document or a PDF)."}
+            else:
+                # Convert docx to pdf in a worker process so other tool calls keep flowing.
+                # Identical documents (retries, repeat polls) reuse the cached PDF.
+                digest = await asyncio.to_thread(_hash_file, input_path)
+                cache_pdf = _cached_pdf_path(files_dir, digest)
+                # Pinned before the existence check, so eviction can't remove the entry
+                # between a hit (or a fresh conversion) and its publishing below
+                _pin_cached(cache_pdf)
+                pinned = cache_pdf
+                cache_hit = await _convert_cached(input_path, cache_pdf, owned=cleanup_tmp)
+                src_pdf = cache_pdf
+                logger.info("convert:cache", extra={"req": req_id, "hit": cache_hit, "key": digest})
+                if cache_hit:
+                    await asyncio.to_thread(_touch_cached, cache_pdf)
+                elif _CACHE_MAX_BYTES:
+                    await asyncio.to_thread(_evict_cache, os.path.dirname(cache_pdf), _CACHE_MAX_BYTES)
+
+            if output_path:
+                # A caller-chosen path gets its own copy: as a hardlink, any write there
+                # would corrupt the cache entry and every published copy of this document
+                await asyncio.to_thread(_link_or_copy, src_pdf, output_pdf, False)
+
+            # Publish into files_dir for static serving; hardlinks stay within FILES_DIR
+            public_pdf_path, file_url = await asyncio.to_thread(
+                _publish_and_url, files_dir, src_pdf, output_pdf, base_url, link_src
+            )
+            pdf_size = os.path.getsize(public_pdf_path)
+            if include_b64 and pdf_size > _INLINE_MAX_BYTES:
+                # Too big to inline; encoding it would only bloat the response
+                logger.warning(
+                    "base64 skipped:over PDF_INLINE_MAX_BYTES",
+                    extra={"req": req_id, "bytes": pdf_size, "limit": _INLINE_MAX_BYTES},
+                )
+                include_b64 = False
             if not file_url and not include_b64:
                 # Without BASE_URL and base64 disabled, we can't return a usable artifact
-                if cleanup_tmp:
-                    _safe_remove(input_path)
                 logger.error("publish error:no BASE_URL and base64 disabled", extra={"req": req_id})
-                return {"success": False, "error": "Set BASE_URL or set INCLUDE_BASE64=true to receive the PDF as base64."}
+                if pdf_size > _INLINE_MAX_BYTES:
+                    return {"success": False, "error": f"PDF is {pdf_size} bytes, over PDF_INLINE_MAX_BYTES ({_INLINE_MAX_BYTES}); set BASE_URL to receive a link."}
+                return {"success": False, "error": "Set BASE_URL, or set INCLUDE_BASE64=true (or pass include_base64) to receive the PDF as base64."}
 
             # Optional base64 for compatibility (can be large for WhatsApp)
-            pdf_b64 = _read_pdf_base64(public_pdf_path) if include_b64 else None
+            pdf_b64 = await asyncio.to_thread(_read_pdf_base64, public_pdf_path) if include_b64 else None
 
             result = _success_result(file_url or "", pdf_b64)
-            # Cleanup temp input if needed
-            if cleanup_tmp:
-                _safe_remove(input_path)
-            logger.info("give_pdf done", extra={"req": req_id, "url": file_url, "base64": bool(pdf_b64)})
+            logger.info(
+                "give_pdf done",
+                extra={"req": req_id, "url": file_url, "base64_chars": len(pdf_b64) if pdf_b64 else 0},
+            )
             return result
         except Exception as e:
-            # Attempt cleanup on error as well
-            if 'cleanup_tmp' in locals() and cleanup_tmp:
-                _safe_remove(locals().get('input_path'))
             logger.exception("give_pdf exception", extra={"error": str(e)})
             return {"success": False, "error": str(e)}
+        finally:
+            # Temp inputs go on every exit, including cancellation (client disconnects)
+            if cleanup_tmp:
+                _safe_remove(input_path)
+            if pinned:
+                _unpin_cached(pinned)
@@ -1,11 +1,55 @@
 from __future__ import annotations
 
+import asyncio
 import os
+import time
+from importlib.util import find_spec
 from typing import Any, Dict
 
 from fastmcp import FastMCP
 
 
+# Monitors poll health every few seconds; reuse a result for this many seconds
+_HEALTH_TTL = float(os.environ.get("HEALTH_TTL") or 10)
+_HEALTH_CACHE: Dict[str, Any] = {"ts": 0.0, "info": None}
+
+# Module availability doesn't change while the server runs
+_HAS_PYPANDOC = find_spec("pypandoc") is not None
+_HAS_DOCX2PDF = find_spec("docx2pdf") is not None
+
+_PANDOC_VERSION: str | None = None
+# Directories that passed a real write probe
+_WRITE_PROBED: set[str] = set()
+
+
+def _pandoc_version() -> str | None:
+    """Installed pandoc version, looked up until found (it spawns `pandoc --version`)."""
+    global _PANDOC_VERSION
+    if _PANDOC_VERSION is None:
+        import pypandoc  # type: ignore
+
+        try:
+            _PANDOC_VERSION = str(pypandoc.get_pandoc_version())
+        except Exception:
+            pass
+    return _PANDOC_VERSION
+
+
+def _check_files_dir(files_dir: str) -> None:
+    """Raise if files_dir isn't writable; a real write probe runs only once per directory."""
+    os.makedirs(files_dir, exist_ok=True)
+    if not os.access(files_dir, os.W_OK):
+        raise PermissionError(f"FILES_DIR is not writable: {files_dir}")
+    if files_dir in _WRITE_PROBED:
+        return
+    # os.access can pass on read-only mounts and some network filesystems
+    test_path = os.path.join(files_dir, ".write_test")
+    with open(test_path, "w", encoding="utf-8") as f:
+        f.write("ok")
+    os.remove(test_path)
+    _WRITE_PROBED.add(files_dir)
+
+
 def _gather_health_sync() -> Dict[str, Any]:
     info: Dict[str, Any] = {"ok": True, "checks": {}}
 
@@ -20,11 +64,7 @@ def _gather_health_sync() -> Dict[str, Any]:
     files_dir = os.environ.get("FILES_DIR", "files")
     files_dir_ok = False
     try:
-        os.makedirs(files_dir, exist_ok=True)
-        test_path = os.path.join(files_dir, ".write_test")
-        with open(test_path, "w", encoding="utf-8") as f:
-            f.write("ok")
-        os.remove(test_path)
+        _check_files_dir(files_dir)
         files_dir_ok = True
     except Exception as e:
         info["ok"] = False
@@ -32,28 +72,16 @@ def _gather_health_sync() -> Dict[str, Any]:
     info["checks"]["FILES_DIR"] = {"path": files_dir, "writable": files_dir_ok}
 
     # Pandoc availability
-    try:
-        import pypandoc  # type: ignore
-        ver = None
-        try:
-            ver = pypandoc.get_pandoc_version()
-        except Exception:
-            pass
+    if _HAS_PYPANDOC:
         info["checks"]["pandoc"] = {
             "module": True,
-            "version": str(ver) if ver else None,
+            "version": _pandoc_version(),
         }
-    except Exception:
+    else:
         info["checks"]["pandoc"] = {"module": False}
 
     # docx2pdf availability
-    try:
-        import importlib
-
-        importlib.import_module("docx2pdf")
-        info["checks"]["docx2pdf"] = {"module": True}
-    except Exception:
-        info["checks"]["docx2pdf"] = {"module": False}
+    info["checks"]["docx2pdf"] = {"module": _HAS_DOCX2PDF}
 
     # Attachment ID download config
     info["checks"]["PUCH_DOWNLOAD_URL_TEMPLATE"] = os.environ.get("PUCH_DOWNLOAD_URL_TEMPLATE", "")
@@ -67,4 +95,9 @@ def register(mcp: FastMCP):
 
     @mcp.tool(name="health", description="Return server health, config, and converter readiness diagnostics")
     async def health() -> Dict[str, Any]:
-        return _gather_health_sync()
+        now = time.monotonic()
+        if _HEALTH_CACHE["info"] is None or now - _HEALTH_CACHE["ts"] >= _HEALTH_TTL:
+            # Off the loop: the pandoc lookup spawns a process and the write probe hits disk
+            _HEALTH_CACHE["info"] = await asyncio.to_thread(_gather_health_sync)
+            _HEALTH_CACHE["ts"] = now
+        return _HEALTH_CACHE["info"]
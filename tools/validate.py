@@ -6,6 +6,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 MY_NUMBER = os.environ.get("MY_NUMBER")
+# Normalized once; the environment doesn't change while the server runs
+_MY_NUMBER_NORMALIZED = MY_NUMBER.strip().replace("+", "") if MY_NUMBER else None
 
 # Expose a function that can be registered with FastMCP
 
@@ -18,6 +20,4 @@ def register(mcp: FastMCP):
     @mcp.tool(description="Validate server and return owner's phone number")
     async def validate() -> str:
         # Ensure the number is configured and formatted properly
-        if not MY_NUMBER:
-            return "<error>MY_NUMBER not configured</error>"
-        return MY_NUMBER.strip().replace("+", "")
+        return _MY_NUMBER_NORMALIZED or "<error>MY_NUMBER not configured</error>"